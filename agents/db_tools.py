@@ -1,7 +1,11 @@
 from langchain.tools import tool
-from database.queries import HotelDatabase
+from utils.registry import registry
+from database.queries import SOLD_OUT
+from database.profile_cache import current_caller
+from utils.resilience import commit_allowed
 
-db = HotelDatabase()
+# Shared with the orchestrator instead of building a second HotelDatabase
+db = registry.get("db")
 
 @tool("get_food_menu")
 def get_food_menu_and_voice() -> str:
@@ -18,24 +22,28 @@ def process_booking_tool(entities: dict, user_phone: str):
     If info is missing, prompt user for more details.
     """
     from datetime import datetime
+    user_phone = current_caller() or user_phone
     room_type = entities.get("room_type")
     guest_name = entities.get("guest_name")
     check_in = entities.get("dates", {}).get("check_in")
     check_out = entities.get("dates", {}).get("check_out")
-    available_rooms = db.get_available_rooms(room_type)
-
-    if not available_rooms:
-        return f"Sorry, no {room_type or ''} rooms are available currently."
 
     if guest_name and check_in and check_out:
-        room = available_rooms[0]
         nights = (datetime.strptime(check_out, "%Y-%m-%d") - datetime.strptime(check_in, "%Y-%m-%d")).days
-        total = room["price"] * nights
-        success = db.book_room(room["id"], user_phone, guest_name, check_in, check_out, total)
-        if success:
-            return f"Room {room['room_number']} booked for {guest_name} from {check_in} to {check_out}. Total cost: ₹{total}."
-        else:
-            return "Sorry, booking failed. Please try again."
+        if not commit_allowed():
+            return "Sorry, I couldn't confirm that booking in time, so nothing was booked. Please say it again."
+        # Claims whichever matching room is free right now; concurrent callers never get the same one
+        reservation = db.reserve_room(room_type, user_phone, guest_name, check_in, check_out, nights)
+        if reservation.status == SOLD_OUT:
+            return f"Sorry, no {room_type or ''} rooms are available currently."
+        booking = reservation.booking
+        return f"Room {booking.room_number} booked for {guest_name} from {check_in} to {check_out}. Total cost: ₹{reservation.total_amount}."
+
+    # Only offering a sample, so at most three rooms are fetched
+    available_rooms = db.get_available_rooms(room_type, limit=3)
+
+    if not available_rooms:
+        return f"Sorry, no {room_type or ''} rooms are available currently."
 
     missing = []
     if not guest_name:
@@ -45,7 +53,7 @@ def process_booking_tool(entities: dict, user_phone: str):
     if not check_out:
         missing.append("check-out date")
 
-    sample_rooms = ", ".join(f"{r['room_number']}({r['room_type']}, ₹{r['price']})" for r in available_rooms[:3])
+    sample_rooms = ", ".join(f"{r.room_number}({r.room_type}, ₹{r.price})" for r in available_rooms[:3])
     return f"We have the following rooms available: {sample_rooms}. Please provide {', '.join(missing)} to proceed."
 
 @tool("process_food_order")
@@ -53,26 +61,34 @@ def process_food_order_tool(entities: dict, user_phone: str):
     """
     Process food orders extracted from user intents.
     """
+    user_phone = current_caller() or user_phone
     items = entities.get("food_items", [])
     quantity = entities.get("quantity", 1)
-    bookings = db.get_user_bookings(user_phone)
+    # Usually already warm from the call-start prefetch
+    profile = db.get_caller_profile(user_phone)
 
-    if not bookings:
+    if not profile.booking:
         return "You don't have any existing bookings. Please provide your room number."
 
-    booking = bookings[0]
-    room_number = booking.get("room_number") or booking.get("rooms", {}).get("room_number")
+    booking = profile.booking
+    room_number = profile.room_number
 
     if not items:
         return get_food_menu_and_voice()
 
     total_cost = 0
+    priced_items = []
     for item in items:
         price_per_item = db.get_food_price(item)
         if price_per_item is None:
             price_per_item = 100  # default price
         total_cost += price_per_item * quantity
-        db.place_order(booking.id, room_number, item, quantity, price_per_item * quantity)
+        priced_items.append((item, price_per_item * quantity))
+
+    if not commit_allowed():
+        return "Sorry, I couldn't place that order in time, so nothing was ordered. Please say it again."
+    for item, price in priced_items:
+        db.place_order(booking.id, room_number, item, quantity, price)
 
     ordered_items = ", ".join(f"{quantity}x {item}" for item in items)
     return f"Order placed: {ordered_items} for room {room_number}. Total bill: ₹{total_cost}. Your food will arrive soon."
@@ -3,6 +3,7 @@ import json
 import logging
 from openai import OpenAI
 from langchain.tools import tool
+from utils.log_config import debug_payload
 
 logger = logging.getLogger(__name__)
 
@@ -19,30 +20,39 @@ class LLMIntentAgent:
         )
         self.model = "deepseek-reasoner"  # ✅ DeepSeek R1 model name
 
-    @tool("analyze_intent")
-    def analyze_intent(self, user_text: str) -> dict:
-        """Analyze a hotel guest utterance and return intent and entities as JSON."""
+    def extract_intent(self, user_text: str, timeout: float = None) -> dict:
+        """Call DeepSeek for intent extraction, raising on API errors or timeouts."""
         prompt = (
             "Analyze this hotel guest utterance. Extract bookings, room type, food items, and quantities as JSON.\n"
             "Return ONLY valid JSON with structure: {\"intent\": \"booking/food/inquiry\", \"entities\": {...}}\n"
             "Input: "
         )
-        
+
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt + user_text}],
+            temperature=0.3,
+            max_tokens=400,
+            timeout=timeout,
+        )
+
+        text = response.choices[0].message.content
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt + user_text}],
-                temperature=0.3,
-                max_tokens=400,
-            )
-            
-            text = response.choices[0].message.content
             data = json.loads(text)
-            logger.info(f"Intent extraction result: {data}")
-            return data
-            
+        except json.JSONDecodeError:
+            # A malformed reply is the model's fault, not the provider's; don't trip the breaker
+            logger.warning("Intent extraction returned non-JSON: %s", text)
+            return {"intent": "unknown", "entities": {}}
+        debug_payload(logger, "Intent extraction result: %s", data)
+        return data
+
+    @tool("analyze_intent")
+    def analyze_intent(self, user_text: str) -> dict:
+        """Analyze a hotel guest utterance and return intent and entities as JSON."""
+        try:
+            return self.extract_intent(user_text)
         except Exception as e:
-            logger.error(f"Intent extraction error: {e}")
+            logger.error("Intent extraction error: %s", e)
             return {"intent": "unknown", "entities": {}}
 
 llm_tool = LLMIntentAgent()
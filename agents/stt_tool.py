@@ -2,9 +2,12 @@ import os
 import azure.cognitiveservices.speech as speechsdk
 import logging
 from langchain.tools import tool
+from utils.log_config import debug_payload
 
 logger = logging.getLogger(__name__)
 
+PUSH_CHUNK_BYTES = 32 * 1024
+
 class AzureSTTTool:
     def __init__(self):
         self.speech_key = os.getenv("AZURE_SPEECH_KEY")
@@ -14,21 +17,47 @@ class AzureSTTTool:
         self.speech_config = speechsdk.SpeechConfig(subscription=self.speech_key, region=self.speech_region)
         self.speech_config.speech_recognition_language = "en-IN"
 
+    def recognize(self, audio_file_path: str) -> str:
+        """
+        Transcribe audio, raising on provider errors (cancellation, auth, network).
+        Silence or unrecognised speech is not an error and returns an empty string.
+        """
+        audio_config = speechsdk.AudioConfig(filename=audio_file_path)
+        return self._recognize(audio_config)
+
+    def recognize_pcm(self, sample_rate, bits_per_sample, channels, pcm) -> str:
+        """
+        Transcribe in-memory PCM (as returned by AudioHandler.split_wav) via a push stream.
+        The data is pushed in slices of the caller's buffer; nothing touches disk.
+        """
+        stream_format = speechsdk.audio.AudioStreamFormat(
+            samples_per_second=sample_rate, bits_per_sample=bits_per_sample, channels=channels
+        )
+        stream = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+        for offset in range(0, len(pcm), PUSH_CHUNK_BYTES):
+            stream.write(pcm[offset:offset + PUSH_CHUNK_BYTES].tobytes())
+        stream.close()
+        return self._recognize(speechsdk.audio.AudioConfig(stream=stream))
+
+    def _recognize(self, audio_config) -> str:
+        recognizer = speechsdk.SpeechRecognizer(self.speech_config, audio_config)
+        result = recognizer.recognize_once()
+        if result.reason == speechsdk.ResultReason.RecognizedSpeech:
+            debug_payload(logger, "STT success: %s", result.text)
+            return result.text
+        if result.reason == speechsdk.ResultReason.Canceled:
+            details = result.cancellation_details
+            raise RuntimeError(f"STT canceled: {details.reason} {details.error_details}")
+        logger.warning("STT failed: %s", result.reason)
+        return ""
+
     @tool("transcribe_audio")
     def transcribe_audio(self, audio_file_path: str) -> str:
         """Transcribe input audio file to text using Azure Cognitive Services."""
         try:
-            audio_config = speechsdk.AudioConfig(filename=audio_file_path)
-            recognizer = speechsdk.SpeechRecognizer(self.speech_config, audio_config)
-            result = recognizer.recognize_once()
-            if result.reason == speechsdk.ResultReason.RecognizedSpeech:
-                logger.info(f"STT success: {result.text}")
-                return result.text
-            else:
-                logger.warning(f"STT failed: {result.reason}")
-                return ""
+            return self.recognize(audio_file_path)
         except Exception as e:
-            logger.error(f"STT error: {e}")
+            logger.error("STT error: %s", e)
             return ""
 
 stt_tool = AzureSTTTool()
@@ -14,19 +14,40 @@ class AzureTTSTool:
             raise ValueError("Azure Speech credentials not set")
         self.speech_config = speechsdk.SpeechConfig(subscription=self.speech_key, region=self.speech_region)
         self.speech_config.speech_synthesis_voice_name = "en-IN-Neer Neural"
+        self.speech_config.set_speech_synthesis_output_format(
+            speechsdk.SpeechSynthesisOutputFormat.Riff16Khz16BitMonoPcm
+        )
+
+    def synthesize_bytes(self, text: str) -> bytes:
+        """Synthesize text to an in-memory WAV buffer, raising if Azure did not complete."""
+        synthesizer = speechsdk.SpeechSynthesizer(self.speech_config, audio_config=None)
+        result = synthesizer.speak_text_async(text).get()
+        if result.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
+            details = result.cancellation_details
+            raise RuntimeError(f"TTS canceled: {details.reason} {details.error_details}")
+        logger.info("TTS synthesized %s bytes", len(result.audio_data))
+        return result.audio_data
+
+    def render(self, text: str, output_path: str) -> str:
+        """Synthesize text straight into output_path, raising if Azure did not complete."""
+        audio_config = speechsdk.audio.AudioOutputConfig(filename=output_path)
+        synthesizer = speechsdk.SpeechSynthesizer(self.speech_config, audio_config)
+        result = synthesizer.speak_text_async(text).get()
+        if result.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
+            details = result.cancellation_details
+            raise RuntimeError(f"TTS canceled: {details.reason} {details.error_details}")
+        logger.info("TTS synthesized to %s", output_path)
+        return output_path
 
     @tool("synthesize_speech")
     def synthesize_speech(self, text: str) -> str:
         """Synthesize speech from text using Azure TTS and save to WAV file."""
         try:
             temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-            audio_config = speechsdk.AudioConfig(filename=temp_file.name)
-            synthesizer = speechsdk.SpeechSynthesizer(self.speech_config, audio_config)
-            synthesizer.speak_text_async(text).get()
-            logger.info(f"TTS synthesized to {temp_file.name}")
-            return temp_file.name
+            temp_file.close()
+            return self.render(text, temp_file.name)
         except Exception as e:
-            logger.error(f"TTS error: {e}")
+            logger.error("TTS error: %s", e)
             return ""
 
 tts_tool = AzureTTSTool()
@@ -0,0 +1,74 @@
+"""
+Booking contention benchmark: many concurrent callers reserving the same room type until it sells out.
+
+    python benchmarks/bench_booking.py [--rooms 200] [--workers 16]
+
+Uses a throwaway SQLite file unless BENCH_DB_URL points at a scratch PostgreSQL database
+(its rooms/bookings tables are recreated).
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    db_url = os.getenv("BENCH_DB_URL")
+    if not db_url:
+        db_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ["SUPABASE_DB"] = db_url
+
+    from database.supabase_connect import Base, engine, SessionLocal
+    from database.models import Room
+    from database.queries import HotelDatabase, RESERVED
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with SessionLocal() as session:
+        session.add_all(
+            Room(room_number=f"{100 + i}", room_type="deluxe", price=3000.0, is_available=True)
+            for i in range(args.rooms)
+        )
+        session.commit()
+
+    db = HotelDatabase()
+    booked_rooms = []
+    lock = threading.Lock()
+
+    def caller(n):
+        confirmed = 0
+        while True:
+            reservation = db.reserve_room("deluxe", f"+91{n:010d}", f"Guest {n}", date(2026, 1, 1), date(2026, 1, 3), 2)
+            if reservation.status != RESERVED:
+                return confirmed
+            confirmed += 1
+            with lock:
+                booked_rooms.append(reservation.booking.room_id)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        per_caller = list(pool.map(caller, range(args.workers)))
+    elapsed = time.perf_counter() - started
+
+    duplicates = len(booked_rooms) - len(set(booked_rooms))
+    print(f"{engine.dialect.name}: {len(booked_rooms)}/{args.rooms} rooms booked by {args.workers} workers "
+          f"in {elapsed:.2f}s = {len(booked_rooms) / elapsed:.1f} bookings/s")
+    print(f"per-worker bookings: min {min(per_caller)}, max {max(per_caller)}; double-booked rooms: {duplicates}")
+    if duplicates or len(booked_rooms) != args.rooms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Cold-start benchmark: time to import the app in a fresh interpreter, and optionally the provider warm-up.
+
+    python benchmarks/bench_startup.py [--runs 5] [--warm-up]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter() - started
+result = {"import_seconds": imported}
+if WARM_UP:
+    from utils.registry import registry
+    started = time.perf_counter()
+    registry.warm_up()
+    result["warm_up_seconds"] = time.perf_counter() - started
+    result["providers"] = registry.status()
+print(json.dumps(result))
+"""
+
+
+def run_once(warm_up):
+    out = subprocess.run(
+        [sys.executable, "-c", f"WARM_UP = {warm_up!r}\n{PROBE}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warm-up", action="store_true", help="also time registry.warm_up()")
+    args = parser.parse_args()
+
+    results = [run_once(args.warm_up) for _ in range(args.runs)]
+    imports = [r["import_seconds"] for r in results]
+    print(f"import main: median {statistics.median(imports) * 1000:.1f} ms, "
+          f"min {min(imports) * 1000:.1f} ms over {args.runs} runs")
+    if args.warm_up:
+        warm = [r["warm_up_seconds"] for r in results]
+        print(f"warm-up:     median {statistics.median(warm) * 1000:.1f} ms")
+        print(json.dumps(results[-1]["providers"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import os
+import time
+import logging
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "900"))
+PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "5000"))
+RECENT_ORDERS_LIMIT = 5
+
+# Phone number of the caller whose turn is running; tools act for this caller, not for a number the LLM supplies
+_caller = contextvars.ContextVar("caller", default=None)
+
+
+def bind_caller(user_phone):
+    _caller.set(user_phone)
+
+
+def current_caller():
+    return _caller.get()
+
+
+class CallerProfile:
+    """What the tools need to know about a caller: latest booking and recent orders."""
+
+    __slots__ = ("user_phone", "booking", "recent_orders", "loaded_at")
+
+    def __init__(self, user_phone, booking=None, recent_orders=None):
+        self.user_phone = user_phone
+        self.booking = booking
+        self.recent_orders = list(recent_orders or [])
+        self.loaded_at = time.monotonic()
+
+    @property
+    def room_number(self):
+        return self.booking.room_number if self.booking else None
+
+
+class CallerProfileCache:
+    """
+    Per-call caller profiles keyed by phone number.
+    Loads are single-flight: a tool that asks while the call-start prefetch is running waits for it
+    instead of issuing the same queries again.
+    Bounded LRU: expired entries are purged on insert and the least recently used are dropped past max_entries.
+    """
+
+    def __init__(self, ttl=PROFILE_CACHE_TTL, max_entries=PROFILE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._profiles = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def _expired(self, profile, now):
+        return now - profile.loaded_at >= self.ttl
+
+    def _store(self, user_phone, profile):
+        # Caller holds the lock
+        now = time.monotonic()
+        for phone in [p for p, cached in self._profiles.items() if self._expired(cached, now)]:
+            del self._profiles[phone]
+        self._profiles[user_phone] = profile
+        self._profiles.move_to_end(user_phone)
+        while len(self._profiles) > self.max_entries:
+            self._profiles.popitem(last=False)
+
+    def get(self, user_phone, loader):
+        with self._lock:
+            profile = self._profiles.get(user_phone)
+            if profile and not self._expired(profile, time.monotonic()):
+                self._profiles.move_to_end(user_phone)
+                return profile
+            future = self._loading.get(user_phone)
+            owner = future is None
+            if owner:
+                future = self._loading[user_phone] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            profile = loader(user_phone)
+            with self._lock:
+                self._store(user_phone, profile)
+            future.set_result(profile)
+            return profile
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._loading.pop(user_phone, None)
+
+    def evict(self, user_phone):
+        with self._lock:
+            self._profiles.pop(user_phone, None)
+
+    def record_booking(self, user_phone, booking):
+        with self._lock:
+            profile = self._profiles.get(user_phone)
+            if profile:
+                profile.booking = booking
+                profile.recent_orders = []
+
+    def record_order(self, booking_id, order):
+        with self._lock:
+            for profile in self._profiles.values():
+                if profile.booking and profile.booking.id == booking_id:
+                    profile.recent_orders.insert(0, order)
+                    del profile.recent_orders[RECENT_ORDERS_LIMIT:]
+
+
+profile_cache = CallerProfileCache()
@@ -1,38 +1,126 @@
-from database.supabase_connect import SessionLocal
+from database.supabase_connect import SessionLocal, engine
 from database.models import Room, Booking, FoodMenu, Order, CallLog
+from database.profile_cache import profile_cache, CallerProfile, RECENT_ORDERS_LIMIT
 from sqlalchemy.orm import Session
+from collections import namedtuple
+from datetime import date
+import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Column projections returned by the query layer; no ORM identity-map or instance state
+RoomRow = namedtuple("RoomRow", ["id", "room_number", "room_type", "price"])
+BookingRow = namedtuple("BookingRow", ["id", "room_id", "room_number", "user_name", "check_in", "check_out", "status"])
+OrderRow = namedtuple("OrderRow", ["id", "food_item", "quantity", "price", "status"])
+Reservation = namedtuple("Reservation", ["status", "booking", "total_amount"])
+
+RESERVED = "confirmed"
+SOLD_OUT = "sold_out"
+
+# Without SKIP LOCKED, concurrent bookers try a shuffled window of candidates so they rarely collide
+RESERVE_CANDIDATES = 8
 
 class HotelDatabase:
     def __init__(self):
         self.db_session = SessionLocal
+        self.skip_locked = engine.dialect.name == "postgresql"
 
-    def get_available_rooms(self, room_type=None):
+    def get_available_rooms(self, room_type=None, limit=None):
         with self.db_session() as db:
-            query = db.query(Room).filter(Room.is_available == True)
+            query = db.query(Room.id, Room.room_number, Room.room_type, Room.price).filter(Room.is_available == True)
             if room_type:
                 query = query.filter(Room.room_type == room_type)
-            return [r.__dict__ for r in query.all()]
+            query = query.order_by(Room.id)
+            if limit:
+                query = query.limit(limit)
+            return [RoomRow._make(r) for r in query.all()]
 
     def book_room(self, room_id, user_phone, user_name, check_in, check_out, total_amount):
+        """Book a specific room; returns False if someone else already holds it."""
         with self.db_session() as db:
-            booking = Booking(
-                room_id=room_id,
-                user_phone=user_phone,
-                user_name=user_name,
-                check_in=check_in,
-                check_out=check_out,
-                total_amount=total_amount,
-                status='confirmed'
-            )
-            db.add(booking)
-            db.query(Room).filter(Room.id == room_id).update({"is_available": False})
-            db.commit()
-            return True
+            booking = self._claim_room(db, room_id, user_phone, user_name, check_in, check_out, total_amount)
+            return booking is not None
 
-    def get_user_bookings(self, user_phone):
+    def reserve_room(self, room_type, user_phone, user_name, check_in, check_out, nights):
+        """
+        Atomically claim any available room of room_type and book it.
+        Returns Reservation(RESERVED, booking, total) or Reservation(SOLD_OUT, None, None).
+        PostgreSQL uses SELECT ... FOR UPDATE SKIP LOCKED so concurrent bookers land on different rows;
+        other databases fall back to a conditional update over shuffled candidates.
+        """
         with self.db_session() as db:
-            bookings = db.query(Booking).filter(Booking.user_phone == user_phone).all()
-            return [b.__dict__ for b in bookings]
+            while True:
+                query = db.query(Room.id, Room.price).filter(Room.is_available == True)
+                if room_type:
+                    query = query.filter(Room.room_type == room_type)
+                query = query.order_by(Room.id)
+                if self.skip_locked:
+                    candidates = query.limit(1).with_for_update(skip_locked=True).all()
+                else:
+                    candidates = query.limit(RESERVE_CANDIDATES).all()
+                    random.shuffle(candidates)
+
+                if not candidates:
+                    db.rollback()
+                    return Reservation(SOLD_OUT, None, None)
+
+                for room_id, price in candidates:
+                    total = price * nights
+                    booking = self._claim_room(db, room_id, user_phone, user_name, check_in, check_out, total)
+                    if booking:
+                        return Reservation(RESERVED, booking, total)
+                # Every candidate was taken by a concurrent booker since we read it; inventory shrank, so look again
+
+    def _claim_room(self, db, room_id, user_phone, user_name, check_in, check_out, total_amount):
+        """Flip is_available only if it is still set; the winner inserts the booking and commits."""
+        claimed = (
+            db.query(Room)
+            .filter(Room.id == room_id, Room.is_available == True)
+            .update({"is_available": False}, synchronize_session=False)
+        )
+        if not claimed:
+            db.rollback()
+            return None
+
+        booking = Booking(
+            room_id=room_id,
+            user_phone=user_phone,
+            user_name=user_name,
+            check_in=check_in,
+            check_out=check_out,
+            total_amount=total_amount,
+            status='confirmed'
+        )
+        db.add(booking)
+        room_number = db.query(Room.room_number).filter(Room.id == room_id).scalar()
+        # Flush for the id; reading it after commit would re-select the expired row
+        db.flush()
+        row = BookingRow(booking.id, room_id, room_number, user_name, check_in, check_out, 'confirmed')
+        db.commit()
+        profile_cache.record_booking(user_phone, row)
+        return row
+
+    def get_user_bookings(self, user_phone, limit=None, active_only=False):
+        """
+        Bookings for a caller, most recent first, with the room number joined in.
+        active_only keeps confirmed bookings that haven't checked out yet.
+        """
+        with self.db_session() as db:
+            query = (
+                db.query(
+                    Booking.id, Booking.room_id, Room.room_number, Booking.user_name,
+                    Booking.check_in, Booking.check_out, Booking.status,
+                )
+                .outerjoin(Room, Booking.room_id == Room.id)
+                .filter(Booking.user_phone == user_phone)
+                .order_by(Booking.id.desc())
+            )
+            if active_only:
+                query = query.filter(Booking.status == 'confirmed', Booking.check_out >= date.today())
+            if limit:
+                query = query.limit(limit)
+            return [BookingRow._make(b) for b in query.all()]
 
     def place_order(self, booking_id, room_number, food_item, quantity, price):
         with self.db_session() as db:
@@ -45,9 +133,40 @@ class HotelDatabase:
                 status='ordered'
             )
             db.add(order)
+            db.flush()
+            order_id = order.id
             db.commit()
+            profile_cache.record_order(booking_id, OrderRow(order_id, food_item, quantity, price, 'ordered'))
             return True
 
+    def get_recent_orders(self, booking_id, limit=RECENT_ORDERS_LIMIT):
+        with self.db_session() as db:
+            query = (
+                db.query(Order.id, Order.food_item, Order.quantity, Order.price, Order.status)
+                .filter(Order.booking_id == booking_id)
+                .order_by(Order.id.desc())
+                .limit(limit)
+            )
+            return [OrderRow._make(o) for o in query.all()]
+
+    def get_caller_profile(self, user_phone):
+        """Cached caller profile; loads from the database on a miss."""
+        return profile_cache.get(user_phone, self._load_caller_profile)
+
+    def prefetch_caller_profile(self, user_phone):
+        """Call-start hook: warm the profile cache while the greeting plays."""
+        try:
+            self.get_caller_profile(user_phone)
+        except Exception as e:
+            logger.warning("Caller profile prefetch failed for %s: %s", user_phone, e)
+
+    def _load_caller_profile(self, user_phone):
+        # Orders go to the stay in progress, not to a cancelled or past booking
+        bookings = self.get_user_bookings(user_phone, limit=1, active_only=True)
+        booking = bookings[0] if bookings else None
+        orders = self.get_recent_orders(booking.id) if booking else []
+        return CallerProfile(user_phone, booking, orders)
+
     def log_conversation(self, user_phone, user_input, agent_response):
         with self.db_session() as db:
             log = CallLog(
@@ -60,10 +179,10 @@ class HotelDatabase:
 
     def get_food_menu(self):
         with self.db_session() as db:
-            items = db.query(FoodMenu).all()
+            items = db.query(FoodMenu.item_name, FoodMenu.price).all()
             return [dict(item_name=i.item_name, price=i.price) for i in items]
 
     def get_food_price(self, item_name):
         with self.db_session() as db:
-            item = db.query(FoodMenu).filter(FoodMenu.item_name == item_name).first()
-            return float(item.price) if item else 0.0
+            price = db.query(FoodMenu.price).filter(FoodMenu.item_name == item_name).limit(1).scalar()
+            return float(price) if price is not None else 0.0
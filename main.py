@@ -1,20 +1,28 @@
 from fastapi import FastAPI, Request, Response, UploadFile, File
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import contextvars
 import logging
 import os
 import uuid
 from orchestrator import orchestrator
+from utils.resilience import Deadline, providers
+from utils.admission import admission, AdmissionRejected
+from utils.registry import registry, CORE_PROVIDERS
+from utils.log_config import configure_logging, bind_call, debug_payload
+from database.profile_cache import profile_cache
 from dotenv import load_dotenv
 from datetime import datetime
-import shutil
-import tempfile
 
 AUDIO_DIR = "static/audio"
 os.makedirs(AUDIO_DIR, exist_ok=True)
 
 load_dotenv()
 
-logger = logging.getLogger("uvicorn.error")
+configure_logging()
+logger = logging.getLogger(__name__)
 
 PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "https://ai-hotel-receptionist.onrender.com").rstrip("/")
 
@@ -26,9 +34,51 @@ app = FastAPI(
 
 app.mount("/audio", StaticFiles(directory=AUDIO_DIR), name="audio")
 
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() in ("true", "1", "yes")
+
+def warm_up():
+    """Build providers, then render the fallback and hold prompts so degraded turns can return them instantly"""
+    registry.warm_up()
+    orchestrator.prerender_prompts()
+
+warm_up_future = None
+
+def start_warm_up():
+    """Start warm-up in the background unless a run is already in progress"""
+    global warm_up_future
+    if warm_up_future is None or warm_up_future.done():
+        warm_up_future = asyncio.get_running_loop().run_in_executor(None, warm_up)
+
+@app.on_event("startup")
+async def warm_up_on_startup():
+    # Runs in the background so the server accepts traffic (and answers /ready) immediately
+    if WARMUP_ON_STARTUP:
+        start_warm_up()
+
 # Track conversation state for multiple applets
 conversation_states = {}
 
+def hold_response():
+    """Cheap overload reply: pre-rendered hold prompt, then keep recording"""
+    hold_audio = orchestrator.hold_audio()
+    if hold_audio:
+        prompt = f"<Play>{PUBLIC_BASE_URL}/audio/{os.path.basename(hold_audio)}</Play>"
+    else:
+        prompt = "<Say>All our receptionists are busy right now. Please hold, and say your request again after the beep.</Say>"
+    resp = f"""<?xml version="1.0" encoding="UTF-8"?>
+<Response>
+    {prompt}
+    <Record maxLength="30" timeout="5" />
+</Response>"""
+    return Response(content=resp, media_type="application/xml")
+
+async def run_turn(audio_source, caller, deadline):
+    """Admit the turn, then run the blocking pipeline off the event loop"""
+    async with admission.admit(deadline):
+        # Carry the CallSid logging context into the worker thread
+        ctx = contextvars.copy_context()
+        return await run_in_threadpool(ctx.run, orchestrator.process_call, audio_source, caller, deadline)
+
 # ========== ROOT ROUTE - FIXES 404 ERROR ==========
 @app.get("/")
 async def root():
@@ -38,6 +88,7 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "health": "/health",
+            "ready": "/ready",
             "exotel_webhook": "/exotel_webhook",
             "amazon_connect_audio": "/amazon_connect_audio",
             "docs": "/docs"
@@ -52,24 +103,44 @@ async def health_check():
         "timestamp": datetime.now().isoformat(),
         "service": "AI Hotel Receptionist",
         "active_conversations": len(conversation_states),
+        "providers": {name: guard.status() for name, guard in providers.items()},
+        "admission": admission.status(),
         "uptime": "running"
     }
 
+# ========== READINESS CHECK ENDPOINT ==========
+@app.get("/ready")
+async def readiness_check():
+    ready = registry.ready(CORE_PROVIDERS)
+    if not ready:
+        # Probes never route traffic to an unready instance, so polling is what drives (or retries) warm-up
+        start_warm_up()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "timestamp": datetime.now().isoformat(),
+            "providers": registry.status(),
+        },
+    )
+
 # ========== EXOTEL WEBHOOK INTEGRATION ==========
 @app.api_route("/exotel_webhook", methods=["GET", "POST"])
 async def exotel_webhook(request: Request):
+    # The turn budget starts when Exotel hits us, not when the pipeline starts
+    deadline = Deadline()
     try:
         data = await request.form() if request.method == "POST" else request.query_params
         params = dict(data)
         
-        logger.info(f"Exotel Params: {params}")
-        
         call_type = params.get("CallType", "call-attempt")
         call_sid = params.get("CallSid", str(uuid.uuid4()))
+        bind_call(call_sid)
+        debug_payload(logger, "Exotel Params: %s", params)
         caller = params.get("From", params.get("CallFrom"))
         recording_url = params.get("RecordingUrl")
         
-        logger.info(f"Processing CallType: {call_type} for caller: {caller}")
+        logger.info("Processing CallType: %s for caller: %s", call_type, caller)
         
         # Initialize conversation state
         if call_sid not in conversation_states:
@@ -80,6 +151,10 @@ async def exotel_webhook(request: Request):
         if call_type == "call-attempt" and current_step == 1:
             logger.info("Step 1: Playing greeting and starting recording")
             conversation_states[call_sid]["step"] = 2
+
+            # Load booking/room/orders while the greeting plays so tools skip the DB round-trips later
+            if caller:
+                asyncio.get_running_loop().run_in_executor(None, orchestrator.prefetch_caller, caller)
             
             # ✅ CORRECT XML format for greeting + recording
             resp = """<?xml version="1.0" encoding="UTF-8"?>
@@ -92,14 +167,14 @@ async def exotel_webhook(request: Request):
             return Response(content=resp, media_type="application/xml")
         
         elif call_type == "completed" and recording_url:
-            logger.info(f"Processing recording: {recording_url}")
+            logger.info("Processing recording: %s", recording_url)
             
             try:
-                reply_audio = orchestrator.process_call(recording_url, caller)
+                reply_audio = await run_turn(recording_url, caller, deadline)
                 
                 if reply_audio and os.path.exists(reply_audio):
                     reply_url = f"{PUBLIC_BASE_URL}/audio/{os.path.basename(reply_audio)}"
-                    logger.info(f"AI reply ready: {reply_url}")
+                    logger.info("AI reply ready: %s", reply_url)
                     
                     # ✅ Play AI response and continue recording
                     resp = f"""<?xml version="1.0" encoding="UTF-8"?>
@@ -119,9 +194,12 @@ async def exotel_webhook(request: Request):
 </Response>"""
                     
                     return Response(content=resp, media_type="application/xml")
+
+            except AdmissionRejected:
+                return hold_response()
             
             except Exception as e:
-                logger.error(f"Error processing recording: {e}")
+                logger.error("Error processing recording: %s", e)
                 
                 resp = """<?xml version="1.0" encoding="UTF-8"?>
 <Response>
@@ -132,11 +210,13 @@ async def exotel_webhook(request: Request):
                 return Response(content=resp, media_type="application/xml")
         
         elif call_type in ("hangup", "completed", "end"):
-            logger.info(f"Call ended for caller: {caller}")
+            logger.info("Call ended for caller: %s", caller)
             
             # Clean up conversation state
             if call_sid in conversation_states:
                 del conversation_states[call_sid]
+            if caller:
+                profile_cache.evict(caller)
             
             resp = """<?xml version="1.0" encoding="UTF-8"?>
 <Response>
@@ -147,7 +227,7 @@ async def exotel_webhook(request: Request):
         
         # Handle subsequent call-attempt calls (multiple applets)
         elif call_type == "call-attempt" and current_step > 1:
-            logger.info(f"Subsequent call-attempt (step {current_step}) - waiting for recording")
+            logger.info("Subsequent call-attempt (step %s) - waiting for recording", current_step)
             
             # ✅ Just continue recording without repeating greeting
             resp = """<?xml version="1.0" encoding="UTF-8"?>
@@ -158,7 +238,7 @@ async def exotel_webhook(request: Request):
             return Response(content=resp, media_type="application/xml")
         
         # Default case
-        logger.info(f"Default case for CallType: {call_type}")
+        logger.info("Default case for CallType: %s", call_type)
         
         resp = """<?xml version="1.0" encoding="UTF-8"?>
 <Response>
@@ -169,7 +249,7 @@ async def exotel_webhook(request: Request):
         return Response(content=resp, media_type="application/xml")
     
     except Exception as e:
-        logger.error(f"Webhook error: {e}")
+        logger.error("Webhook error: %s", e)
         
         resp = """<?xml version="1.0" encoding="UTF-8"?>
 <Response>
@@ -181,35 +261,35 @@ async def exotel_webhook(request: Request):
 # ========== AMAZON CONNECT INTEGRATION ==========
 @app.post("/amazon_connect_audio")
 async def amazon_connect_audio(audio: UploadFile = File(...)):
+    deadline = Deadline()
     try:
+        bind_call(f"connect-{uuid.uuid4().hex}")
         logger.info("Received audio from Amazon Connect")
         
-        # Save incoming audio chunk to temporary file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            shutil.copyfileobj(audio.file, tmp)
-            tmp_path = tmp.name
-        
-        logger.info(f"Saved audio to: {tmp_path}")
+        # Keep the upload in memory; the orchestrator streams it straight into STT
+        audio_bytes = await audio.read()
+        logger.info("Received %s bytes of audio", len(audio_bytes))
         
         # Process audio using orchestrator
-        reply_audio_path = orchestrator.process_call(f"file://{tmp_path}", "amazon_connect_caller")
+        try:
+            reply_audio_path = await run_turn(audio_bytes, "amazon_connect_caller", deadline)
+        except AdmissionRejected:
+            hold_audio = orchestrator.hold_audio()
+            if hold_audio:
+                return {"audio_url": f"{PUBLIC_BASE_URL}/audio/{os.path.basename(hold_audio)}", "status": "busy"}
+            return {"error": "Service busy, please retry", "status": "busy"}
         
         if reply_audio_path and os.path.exists(reply_audio_path):
             audio_url = f"{PUBLIC_BASE_URL}/audio/{os.path.basename(reply_audio_path)}"
-            logger.info(f"Generated AI reply: {audio_url}")
+            logger.info("Generated AI reply: %s", audio_url)
             return {"audio_url": audio_url}
         
         logger.error("Failed to generate AI reply")
         return {"error": "AI processing failed"}
         
     except Exception as e:
-        logger.error(f"Amazon Connect audio processing error: {e}")
+        logger.error("Amazon Connect audio processing error: %s", e)
         return {"error": str(e)}
-    
-    finally:
-        # Clean up temporary file
-        if 'tmp_path' in locals() and os.path.exists(tmp_path):
-            os.unlink(tmp_path)
 
 # ========== ADDITIONAL API INFO ENDPOINT ==========
 @app.get("/info")
@@ -230,6 +310,7 @@ async def api_info():
         "endpoints": {
             "/": "API welcome message",
             "/health": "Health check with conversation stats",
+            "/ready": "Readiness check reporting which providers are warm",
             "/exotel_webhook": "Exotel call handling webhook",
             "/amazon_connect_audio": "Process audio from Amazon Connect",
             "/docs": "Interactive API documentation",
@@ -1,161 +1,234 @@
 import uuid
 import os
+import hashlib
 import logging
-from agents.stt_tool import stt_tool
-from agents.llm_tools import llm_tool
-from agents.tts_tool import AzureTTSTool
-from agents.autogen_agents import manager
 from utils.audio_handler import AudioHandler
-from database.queries import HotelDatabase
-#from blob_storage import blob_storage
+from utils.resilience import Deadline, DeadlineExceeded, CircuitOpenError, providers, bind_deadline
+from utils.registry import registry
+from utils.log_config import set_stage, debug_payload
+from database.profile_cache import bind_caller
 import requests
-import tempfile
 
 logger = logging.getLogger(__name__)
 
 AUDIO_FOLDER = "static/audio"
 os.makedirs(AUDIO_FOLDER, exist_ok=True)
 
+
+def _prompt_path(name, text):
+    # Content hash in the name, so editing the text renders a new file instead of reusing the old one
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(AUDIO_FOLDER, f"connect_{name}_{digest}.wav")
+
+FALLBACK_TEXT = "I apologize, but I'm having trouble processing your request right now. Let me connect you with our reception team who can assist you immediately."
+FALLBACK_AUDIO_PATH = _prompt_path("fallback", FALLBACK_TEXT)
+HOLD_TEXT = "All our receptionists are busy right now. Please hold, and say your request again after the beep."
+HOLD_AUDIO_PATH = _prompt_path("hold", HOLD_TEXT)
+
 class CallOrchestrator:
     def __init__(self):
         self.audio_handler = AudioHandler()
-        self.db = HotelDatabase()
 
-    def process_call(self, audio_source, user_phone):
+    # Providers resolve through the registry so importing the orchestrator stays cheap
+    @property
+    def db(self):
+        return registry.get("db")
+
+    @property
+    def tts(self):
+        return registry.get("tts")
+
+    def process_call(self, audio_source, user_phone, deadline=None):
         """
         Process call with Amazon Connect integration and Azure Blob Storage
-        Supports both local files and remote URLs from Connect
+        Supports in-memory audio buffers, local files and remote URLs from Connect
+        Every provider call shares the per-turn deadline; an open breaker short-circuits to fallback audio
         """
+        deadline = deadline or Deadline()
+        audio = None
         inp_file = None
-        temp_file = None
         
         try:
             # Handle different audio sources for Amazon Connect
-            if audio_source.startswith('file://'):
+            if isinstance(audio_source, (bytes, bytearray, memoryview)):
+                # In-memory upload from Connect; fed to STT without touching disk
+                audio = memoryview(audio_source)
+                logger.info("Processing in-memory Connect audio: %s bytes", audio.nbytes)
+
+            elif audio_source.startswith('file://'):
                 # Local file from Connect audio upload
                 inp_file = audio_source.replace('file://', '')
-                logger.info(f"Processing local Connect file: {inp_file}")
+                logger.info("Processing local Connect file: %s", inp_file)
+                if not os.path.exists(inp_file):
+                    logger.error("Audio file not found: %s", inp_file)
+                    return None
                 
             elif audio_source.startswith('http'):
                 # Remote recording URL from Connect
-                logger.info(f"Downloading Connect recording: {audio_source}")
-                temp_file = self._download_audio(audio_source)
-                if temp_file:
-                    inp_file = temp_file
-                else:
+                set_stage("download")
+                logger.info("Downloading Connect recording: %s", audio_source)
+                audio = self._download_audio(audio_source, deadline)
+                if audio is None:
                     logger.error("Failed to download Connect recording")
                     return None
                     
             else:
-                logger.error(f"Unsupported audio source for Amazon Connect: {audio_source}")
-                return None
-
-            if not inp_file or not os.path.exists(inp_file):
-                logger.error(f"Audio file not found: {inp_file}")
+                logger.error("Unsupported audio source for Amazon Connect: %s", audio_source)
                 return None
 
             # Amazon Connect AI pipeline: STT -> Intent -> LLM -> TTS -> Blob Storage
             logger.info("Starting Connect AI pipeline")
             
-            # Step 1: Speech-to-Text
-            transcript = stt_tool.transcribe_audio(inp_file)
-            logger.info(f"Connect STT result: {transcript}")
+            # Step 1: Speech-to-Text (hedged)
+            set_stage("stt")
+            if audio is not None:
+                # Parse before the guard: an unreadable upload is the caller's fault, not Azure's
+                try:
+                    wav = AudioHandler.split_wav(audio)
+                except ValueError as e:
+                    logger.warning("Unreadable Connect audio: %s", e)
+                    return self._generate_fallback_response(user_phone)
+                transcript = providers["azure_stt"].call(registry.get("stt").recognize_pcm, *wav, deadline=deadline)
+            else:
+                transcript = providers["azure_stt"].call(registry.get("stt").recognize, inp_file, deadline=deadline)
+            debug_payload(logger, "Connect STT result: %s", transcript)
 
             if not transcript.strip():
                 logger.warning("Empty transcript from Connect audio")
                 return self._generate_fallback_response(user_phone)
 
-            # Step 2: Intent Analysis
-            intent_data = llm_tool.analyze_intent(transcript)
-            logger.info(f"Connect intent analysis: {intent_data}")
+            # Step 2: Intent Analysis (hedged)
+            set_stage("intent")
+            guard = providers["deepseek"]
+            intent_data = guard.call(registry.get("llm").extract_intent, transcript, timeout=deadline.timeout(guard.timeout), deadline=deadline)
+            debug_payload(logger, "Connect intent analysis: %s", intent_data)
 
             # Step 3: LLM Processing using your existing agents
+            # Not hedged: agent tools book rooms and place orders, so a duplicate run is not safe
+            set_stage("agents")
             chat_history = [{"role": "user", "content": transcript}]
-            result = manager.run(chat_history)
+            # The run is abandoned, not stopped, at its deadline, so tools check the bound deadline before writing
+            guard = providers["agents"]
+            agents_deadline = Deadline(deadline.timeout(guard.timeout))
+            bind_deadline(agents_deadline)
+            bind_caller(user_phone)
+            result = guard.call(registry.get("agents").run, chat_history, deadline=agents_deadline)
 
             reply_text = result[-1]["content"] if isinstance(result, list) else str(result)
-            logger.info(f"Connect AI response: {reply_text}")
+            debug_payload(logger, "Connect AI response: %s", reply_text)
 
-            # Step 4: Text-to-Speech
-            tts = AzureTTSTool()
-            wav_path = tts.synthesize_speech(reply_text)
+            # Step 4: Text-to-Speech into memory
+            set_stage("tts")
+            reply_audio = providers["azure_tts"].call(self.tts.synthesize_bytes, reply_text, deadline=deadline)
 
-            if not wav_path or not os.path.exists(wav_path):
+            if not reply_audio:
                 logger.error("Failed TTS for Connect response")
                 return self._generate_fallback_response(user_phone)
 
-            # Step 5: Save to local storage
+            # Step 5: Single write into the served audio folder
+            set_stage("store")
             output_filename = f"connect_reply_{user_phone}_{uuid.uuid4().hex}.wav"
             output_path = os.path.join(AUDIO_FOLDER, output_filename)
-            os.rename(wav_path, output_path)
+            with open(output_path, "wb") as f:
+                f.write(reply_audio)
 
-            # Step 6: Upload to Azure Blob Storage for Connect access
-            blob_url = blob_storage.upload_audio_file(output_path)
+            # Step 6: Upload the same buffer to Azure Blob Storage for Connect access
+            blob_url = self._upload_to_blob(reply_audio, output_filename, deadline)
             if blob_url:
-                logger.info(f"Connect response uploaded to blob: {blob_url}")
+                logger.info("Connect response uploaded to blob: %s", blob_url)
             else:
                 logger.warning("Failed to upload to blob, using local file")
 
             # Step 7: Log conversation to database
+            set_stage("log")
             self.db.log_conversation(user_phone, transcript, reply_text)
 
-            logger.info(f"Connect call processing completed: {output_path}")
+            logger.info("Connect call processing completed: %s", output_path)
             return output_path
 
-        except Exception as e:
-            logger.error(f"Connect orchestrator error: {e}", exc_info=True)
+        except CircuitOpenError as e:
+            logger.warning("Provider unavailable, serving fallback audio: %s", e)
             return self._generate_fallback_response(user_phone)
 
-        finally:
-            # Clean up temporary files
-            if temp_file and temp_file != inp_file and os.path.exists(temp_file):
-                try:
-                    os.unlink(temp_file)
-                    logger.info(f"Cleaned up temporary file: {temp_file}")
-                except:
-                    pass
+        except DeadlineExceeded as e:
+            logger.warning("Turn deadline exceeded, serving fallback audio: %s", e)
+            return self._generate_fallback_response(user_phone)
+
+        except Exception as e:
+            logger.error("Connect orchestrator error: %s", e, exc_info=True)
+            return self._generate_fallback_response(user_phone)
 
-    def _download_audio(self, url):
-        """Download audio file from Amazon Connect recording URL"""
+    def _download_audio(self, url, deadline):
+        """Download Amazon Connect recording into memory; an open breaker or spent deadline propagates for fallback audio"""
+        guard = providers["recording"]
         try:
-            response = requests.get(url, timeout=30)
+            response = guard.call(requests.get, url, timeout=deadline.timeout(guard.timeout), deadline=deadline)
             response.raise_for_status()
-            
-            temp_file = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-            temp_file.write(response.content)
-            temp_file.close()
-            
-            logger.info(f"Downloaded Connect recording to: {temp_file.name}")
-            return temp_file.name
-            
+            logger.info("Downloaded Connect recording: %s bytes", len(response.content))
+            return memoryview(response.content)
+
+        except (CircuitOpenError, DeadlineExceeded):
+            raise
         except Exception as e:
-            logger.error(f"Failed to download Connect audio: {e}")
+            logger.error("Failed to download Connect audio: %s", e)
             return None
 
-    def _generate_fallback_response(self, user_phone):
-        """Generate fallback response for Connect when AI processing fails"""
+    def _upload_to_blob(self, data, blob_name, deadline):
+        """Best-effort blob upload; skipped when storage is unconfigured, slow or its breaker is open"""
+        guard = providers["blob_storage"]
         try:
-            fallback_text = "I apologize, but I'm having trouble processing your request right now. Let me connect you with our reception team who can assist you immediately."
-            
-            tts = AzureTTSTool()
-            wav_path = tts.synthesize_speech(fallback_text)
-            
-            if wav_path and os.path.exists(wav_path):
-                output_filename = f"connect_fallback_{user_phone}_{uuid.uuid4().hex}.wav"
-                output_path = os.path.join(AUDIO_FOLDER, output_filename)
-                os.rename(wav_path, output_path)
-                
-                # Upload fallback to blob storage
-                blob_storage.upload_audio_file(output_path)
-                
-                return output_path
-            else:
-                logger.error("Failed to generate fallback TTS")
-                return None
-                
+            blob_storage = registry.get("blob_storage")
+            timeout = deadline.timeout(guard.timeout)
+            # upload_audio raises, so the breaker actually sees failed uploads
+            return guard.call(blob_storage.upload_audio, data, blob_name, timeout, deadline=deadline)
         except Exception as e:
-            logger.error(f"Failed to generate fallback response: {e}")
+            logger.warning("Blob upload skipped: %s", e)
             return None
 
+    def prefetch_caller(self, user_phone):
+        """Call-start hook; runs off the event loop since it may also build the DB provider"""
+        try:
+            self.db.prefetch_caller_profile(user_phone)
+        except Exception as e:
+            logger.warning("Caller prefetch skipped for %s: %s", user_phone, e)
+
+    def _prerender(self, text, path):
+        """Render a fixed prompt once so degraded turns never wait on TTS"""
+        if os.path.exists(path):
+            return path
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            deadline = Deadline(providers["azure_tts"].timeout)
+            audio = providers["azure_tts"].call(self.tts.synthesize_bytes, text, deadline=deadline)
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+            self._upload_to_blob(audio, os.path.basename(path), Deadline())
+            logger.info("Pre-rendered prompt audio: %s", path)
+            return path
+        except Exception as e:
+            logger.error("Failed to pre-render %s: %s", path, e)
+            AudioHandler.cleanup_temp_file(tmp_path)
+            return None
+
+    def prerender_prompts(self):
+        """Warm-up hook: render the fallback and overload hold prompts"""
+        self._prerender(FALLBACK_TEXT, FALLBACK_AUDIO_PATH)
+        self._prerender(HOLD_TEXT, HOLD_AUDIO_PATH)
+
+    def hold_audio(self):
+        """Path of the pre-rendered "please hold" prompt, or None if it isn't ready"""
+        return HOLD_AUDIO_PATH if os.path.exists(HOLD_AUDIO_PATH) else None
+
+    def _generate_fallback_response(self, user_phone):
+        """
+        Return the pre-rendered fallback for Connect when AI processing fails.
+        Never renders on the turn; until warm-up has produced the file, callers fall back to <Say>.
+        """
+        if os.path.exists(FALLBACK_AUDIO_PATH):
+            return FALLBACK_AUDIO_PATH
+        logger.warning("Fallback audio not pre-rendered yet for %s", user_phone)
+        return None
+
 # Global instance for Amazon Connect integration
 orchestrator = CallOrchestrator()
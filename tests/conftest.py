@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# database.supabase_connect builds its engine at import time; point it at a throwaway SQLite file
+os.environ.setdefault("SUPABASE_DB", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
@@ -0,0 +1,59 @@
+import asyncio
+
+from utils.admission import AdmissionController, AdmissionRejected
+from utils.resilience import Deadline
+
+
+async def run_turns(controller, count, hold=0.2):
+    async def turn():
+        try:
+            async with controller.admit():
+                await asyncio.sleep(hold)
+                return "ok"
+        except AdmissionRejected as e:
+            return str(e)
+
+    return await asyncio.gather(*(turn() for _ in range(count)))
+
+
+def test_rejects_beyond_concurrency_plus_queue():
+    controller = AdmissionController(max_concurrent=2, max_queue=2, queue_timeout=1)
+    results = asyncio.run(run_turns(controller, 6))
+    assert results.count("ok") == 4
+    assert results.count("queue full") == 2
+    assert controller.status()["rejected"] == 2
+
+
+def test_queued_turns_time_out():
+    controller = AdmissionController(max_concurrent=1, max_queue=5, queue_timeout=0.05)
+    results = asyncio.run(run_turns(controller, 3))
+    assert results == ["ok", "queue timeout", "queue timeout"]
+
+
+def test_queue_wait_is_capped_by_turn_deadline():
+    controller = AdmissionController(max_concurrent=1, max_queue=5, queue_timeout=10)
+
+    async def scenario():
+        async def holder():
+            async with controller.admit():
+                await asyncio.sleep(0.5)
+
+        task = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        try:
+            async with controller.admit(Deadline(0.05)):
+                return "ok"
+        except AdmissionRejected as e:
+            return str(e)
+        finally:
+            await task
+
+    assert asyncio.run(scenario()) == "queue timeout"
+
+
+def test_counters_return_to_zero():
+    controller = AdmissionController(max_concurrent=2, max_queue=1, queue_timeout=1)
+    asyncio.run(run_turns(controller, 5, hold=0.01))
+    status = controller.status()
+    assert (status["active"], status["waiting"]) == (0, 0)
+    assert status["admitted"] + status["rejected"] == 5
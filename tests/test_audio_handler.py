@@ -0,0 +1,47 @@
+import io
+import struct
+import wave
+
+import pytest
+
+from utils.audio_handler import AudioHandler
+
+
+def make_wav(frames=b"\x01\x02" * 100, rate=8000, channels=1, width=2):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(width)
+        w.setframerate(rate)
+        w.writeframes(frames)
+    return buf.getvalue()
+
+
+def test_split_wav_returns_format_and_pcm_view():
+    data = make_wav()
+    sample_rate, bits, channels, pcm = AudioHandler.split_wav(data)
+    assert (sample_rate, bits, channels) == (8000, 16, 1)
+    assert isinstance(pcm, memoryview)
+    assert pcm.tobytes() == b"\x01\x02" * 100
+
+
+def test_split_wav_clamps_placeholder_data_size():
+    data = bytearray(make_wav())
+    data_offset = bytes(data).index(b"data")
+    struct.pack_into("<I", data, data_offset + 4, 0xFFFFFFFF)
+    assert len(AudioHandler.split_wav(data)[3]) == 200
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"ID3\x04 not a wav at all",
+    # RIFF header followed by a fmt chunk cut off mid-way
+    b"RIFF\x24\x00\x00\x00WAVEfmt \x10\x00\x00\x00\x01\x00",
+    # fmt chunk that claims fewer bytes than a PCM header needs
+    b"RIFF\x24\x00\x00\x00WAVEfmt \x04\x00\x00\x00\x01\x00\x01\x00",
+    # valid fmt but no data chunk
+    make_wav()[:36],
+])
+def test_split_wav_rejects_malformed_audio_with_value_error(data):
+    with pytest.raises(ValueError):
+        AudioHandler.split_wav(data)
@@ -0,0 +1,85 @@
+import io
+import json
+import logging
+import contextvars
+
+import pytest
+
+from utils.log_config import bind_call, configure_logging, debug_payload, set_stage, stop_logging
+
+
+class Boom:
+    def __str__(self):
+        raise AssertionError("payload was formatted")
+
+    __repr__ = __str__
+
+
+@pytest.fixture
+def restore_logging():
+    names = ("", "uvicorn", "uvicorn.access")
+    saved = {name: (logging.getLogger(name).handlers[:], logging.getLogger(name).level, logging.getLogger(name).propagate) for name in names}
+    stop_logging()
+    yield
+    stop_logging()
+    for name, (handlers, level, propagate) in saved.items():
+        logger = logging.getLogger(name)
+        logger.handlers, logger.propagate = handlers, propagate
+        logger.setLevel(level)
+
+
+def test_records_carry_call_context_as_json(restore_logging):
+    out = io.StringIO()
+    configure_logging("INFO", stream=out)
+
+    def turn():
+        bind_call("CA123")
+        set_stage("stt")
+        logging.getLogger("test.turn").info("transcribed %s bytes", 42)
+
+    contextvars.copy_context().run(turn)
+    stop_logging()
+
+    record = json.loads(out.getvalue().strip().splitlines()[-1])
+    assert record["message"] == "transcribed 42 bytes"
+    assert record["call_sid"] == "CA123"
+    assert record["stage"] == "stt"
+    assert record["level"] == "INFO"
+    assert record["logger"] == "test.turn"
+
+
+@pytest.fixture
+def payload_logger():
+    logger = logging.getLogger("test.payload")
+    records = []
+    handler = logging.Handler()
+    # Formatting here is what would trip Boom, and a logging error would otherwise only be printed
+    handler.emit = lambda record: records.append(record.getMessage())
+    logger.addHandler(handler)
+    logger.propagate = False
+    logger.records = records
+    yield logger
+    logger.removeHandler(handler)
+    logger.propagate = True
+    logger.setLevel(logging.NOTSET)
+
+
+def test_debug_payload_skips_formatting_when_debug_is_off(monkeypatch, payload_logger):
+    monkeypatch.setattr("utils.log_config.LOG_PAYLOAD_SAMPLE_RATE", 1)
+    payload_logger.setLevel(logging.INFO)
+    debug_payload(payload_logger, "payload: %s", Boom())
+    assert payload_logger.records == []
+
+
+def test_debug_payload_skips_formatting_when_sample_misses(monkeypatch, payload_logger):
+    monkeypatch.setattr("utils.log_config.LOG_PAYLOAD_SAMPLE_RATE", 0)
+    payload_logger.setLevel(logging.DEBUG)
+    debug_payload(payload_logger, "payload: %s", Boom())
+    assert payload_logger.records == []
+
+
+def test_debug_payload_logs_sampled_turns(monkeypatch, payload_logger):
+    monkeypatch.setattr("utils.log_config.LOG_PAYLOAD_SAMPLE_RATE", 1)
+    payload_logger.setLevel(logging.DEBUG)
+    debug_payload(payload_logger, "payload: %s", {"CallSid": "CA123"})
+    assert payload_logger.records == ["payload: {'CallSid': 'CA123'}"]
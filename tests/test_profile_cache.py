@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import namedtuple
+
+import pytest
+
+from database.profile_cache import CallerProfile, CallerProfileCache, RECENT_ORDERS_LIMIT
+
+Booking = namedtuple("Booking", ["id", "room_number"])
+
+
+def loader(booking=None):
+    calls = []
+
+    def load(user_phone):
+        calls.append(user_phone)
+        return CallerProfile(user_phone, booking)
+
+    load.calls = calls
+    return load
+
+
+def test_concurrent_gets_share_one_load():
+    cache = CallerProfileCache()
+    calls = []
+
+    def slow_load(user_phone):
+        calls.append(user_phone)
+        time.sleep(0.1)
+        return CallerProfile(user_phone)
+
+    threads = [threading.Thread(target=cache.get, args=("+911", slow_load)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert calls == ["+911"]
+
+
+def test_failed_load_propagates_and_is_retried():
+    cache = CallerProfileCache()
+
+    def broken(user_phone):
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        cache.get("+911", broken)
+    load = loader()
+    assert cache.get("+911", load).user_phone == "+911"
+    assert load.calls == ["+911"]
+
+
+def test_expired_entries_are_purged():
+    cache = CallerProfileCache(ttl=0.05)
+    cache.get("+911", loader())
+    time.sleep(0.1)
+    cache.get("+912", loader())
+    assert len(cache) == 1
+
+
+def test_least_recently_used_entry_is_dropped_past_max_entries():
+    cache = CallerProfileCache(max_entries=2)
+    first = loader()
+    cache.get("+911", first)
+    cache.get("+912", loader())
+    cache.get("+911", first)  # touch, so +912 is now least recently used
+    cache.get("+913", loader())
+    assert len(cache) == 2
+    cache.get("+911", first)
+    assert first.calls == ["+911"]
+
+
+def test_writes_update_cached_profile():
+    cache = CallerProfileCache()
+    cache.get("+911", loader())
+    cache.record_booking("+911", Booking(7, "101"))
+    for n in range(RECENT_ORDERS_LIMIT + 2):
+        cache.record_order(7, n)
+
+    profile = cache.get("+911", loader())
+    assert profile.room_number == "101"
+    assert profile.recent_orders == list(reversed(range(2, RECENT_ORDERS_LIMIT + 2)))
@@ -0,0 +1,84 @@
+import asyncio
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.registry import LazyProvider, ProviderRegistry
+
+
+@pytest.fixture
+def fake_module(monkeypatch):
+    module = types.ModuleType("fake_provider")
+    builds = []
+
+    class Client:
+        def __init__(self):
+            builds.append(threading.get_ident())
+            time.sleep(0.05)
+
+    module.Client = Client
+    module.builds = builds
+    monkeypatch.setitem(sys.modules, "fake_provider", module)
+    return module
+
+
+def test_concurrent_gets_build_once(fake_module):
+    provider = LazyProvider("fake", "fake_provider", "Client", factory=True)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        instances = list(pool.map(lambda _: provider.get(), range(8)))
+
+    assert len(fake_module.builds) == 1
+    assert all(instance is instances[0] for instance in instances)
+    assert provider.warm
+
+
+def test_failed_import_is_recorded_and_retried(monkeypatch, fake_module):
+    provider = LazyProvider("late", "late_provider", "Client", factory=True)
+    with pytest.raises(ImportError):
+        provider.get()
+    assert not provider.warm
+    assert "late_provider" in provider.status()["error"]
+
+    monkeypatch.setitem(sys.modules, "late_provider", fake_module)
+    assert isinstance(provider.get(), fake_module.Client)
+    assert provider.status()["error"] is None
+
+
+def test_warm_up_makes_core_providers_ready(fake_module):
+    registry = ProviderRegistry()
+    registry.register("core", "fake_provider", "Client", factory=True)
+    registry.register("optional", "missing_provider", "Client")
+
+    assert not registry.ready(["core"])
+    assert registry.status()["core"]["warm"] is False
+
+    registry.warm_up()
+
+    assert registry.ready(["core"])
+    assert not registry.ready()
+    status = registry.status()
+    assert status["core"]["warm"] is True and status["core"]["load_seconds"] is not None
+    assert status["optional"]["error"]
+
+
+def test_ready_endpoint_drives_warm_up(monkeypatch, fake_module):
+    import main
+
+    registry = ProviderRegistry()
+    registry.register("core", "fake_provider", "Client", factory=True)
+    monkeypatch.setattr(main, "registry", registry)
+    monkeypatch.setattr(main, "CORE_PROVIDERS", ["core"])
+    monkeypatch.setattr(main, "warm_up", registry.warm_up)
+    monkeypatch.setattr(main, "warm_up_future", None)
+
+    async def probe():
+        first = await main.readiness_check()
+        await main.warm_up_future
+        second = await main.readiness_check()
+        return first.status_code, second.status_code
+
+    assert asyncio.run(probe()) == (503, 200)
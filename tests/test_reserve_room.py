@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pytest
+
+from database.supabase_connect import Base, engine, SessionLocal
+from database.models import Room, Booking
+from database.profile_cache import profile_cache
+from database.queries import HotelDatabase, RESERVED, SOLD_OUT
+
+CHECK_IN, CHECK_OUT = date.today() + timedelta(days=1), date.today() + timedelta(days=3)
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    return HotelDatabase()
+
+
+def add_rooms(count, room_type="deluxe", price=3000.0):
+    with SessionLocal() as session:
+        session.add_all(
+            Room(room_number=f"{room_type}-{i}", room_type=room_type, price=price, is_available=True)
+            for i in range(count)
+        )
+        session.commit()
+
+
+def reserve(db, n, room_type="deluxe"):
+    return db.reserve_room(room_type, f"+91{n:010d}", f"Guest {n}", CHECK_IN, CHECK_OUT, 2)
+
+
+def test_reserve_books_a_room_of_the_requested_type(db):
+    add_rooms(1, "suite", price=5000.0)
+    add_rooms(1, "deluxe")
+    reservation = reserve(db, 1, "suite")
+    assert reservation.status == RESERVED
+    assert reservation.booking.room_number == "suite-0"
+    assert reservation.total_amount == 10000.0
+    assert db.get_available_rooms("suite") == []
+
+
+def test_reserve_reports_sold_out(db):
+    add_rooms(1)
+    assert reserve(db, 1).status == RESERVED
+    reservation = reserve(db, 2)
+    assert reservation.status == SOLD_OUT
+    assert reservation.booking is None
+
+
+def test_concurrent_bookers_never_share_a_room(db):
+    add_rooms(40)
+
+    def caller(n):
+        rooms = []
+        while True:
+            reservation = reserve(db, n)
+            if reservation.status == SOLD_OUT:
+                return rooms
+            rooms.append(reservation.booking.room_id)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        booked = [room for rooms in pool.map(caller, range(8)) for room in rooms]
+
+    assert len(booked) == 40
+    assert len(set(booked)) == 40
+
+
+def test_book_room_refuses_a_taken_room(db):
+    add_rooms(1)
+    room = db.get_available_rooms("deluxe")[0]
+    assert db.book_room(room.id, "+911", "A", CHECK_IN, CHECK_OUT, 6000.0) is True
+    assert db.book_room(room.id, "+912", "B", CHECK_IN, CHECK_OUT, 6000.0) is False
+
+
+def test_reservation_updates_cached_caller_profile(db):
+    add_rooms(1)
+    phone = "+910000000001"
+    profile_cache.evict(phone)
+    assert db.get_caller_profile(phone).booking is None
+    reservation = reserve(db, 1)
+    assert db.get_caller_profile(phone).booking == reservation.booking
+
+
+def test_caller_profile_uses_the_active_booking(db):
+    add_rooms(3)
+    phone = "+910000000001"
+    active = reserve(db, 1)
+    past = db.reserve_room("deluxe", phone, "Guest 1", date(2020, 1, 1), date(2020, 1, 3), 2)
+    cancelled = reserve(db, 1)
+    with SessionLocal() as session:
+        session.get(Booking, cancelled.booking.id).status = "cancelled"
+        session.commit()
+
+    profile_cache.evict(phone)
+    assert db.get_caller_profile(phone).booking.id == active.booking.id
+    assert past.booking.id > active.booking.id
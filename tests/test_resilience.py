@@ -0,0 +1,159 @@
+import time
+import threading
+
+import pytest
+
+import contextvars
+
+from utils.resilience import (
+    CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceeded, ProviderBusy, ProviderGuard,
+    bind_deadline, commit_allowed,
+)
+
+
+def fail():
+    raise RuntimeError("provider down")
+
+
+def open_breaker(guard):
+    for _ in range(guard.breaker.failure_threshold):
+        with pytest.raises(RuntimeError):
+            guard.call(fail, deadline=Deadline(1))
+    assert guard.breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_opens_after_consecutive_failures():
+    guard = ProviderGuard("test", timeout=1)
+    open_breaker(guard)
+    with pytest.raises(CircuitOpenError):
+        guard.call(lambda: "ok", deadline=Deadline(1))
+
+
+def test_success_resets_failure_count():
+    guard = ProviderGuard("test", timeout=1)
+    with pytest.raises(RuntimeError):
+        guard.call(fail, deadline=Deadline(1))
+    assert guard.call(lambda: "ok", deadline=Deadline(1)) == "ok"
+    assert guard.breaker.failures == 0
+
+
+def test_expired_deadline_does_not_strand_half_open_breaker():
+    guard = ProviderGuard("test", timeout=1)
+    guard.breaker.reset_timeout = 0.05
+    open_breaker(guard)
+    time.sleep(0.1)
+
+    with pytest.raises(DeadlineExceeded):
+        guard.call(lambda: "ok", deadline=Deadline(0))
+
+    # The expired call never reached the provider, so the probe is still available
+    assert guard.call(lambda: "ok", deadline=Deadline(1)) == "ok"
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_timed_out_probe_reopens_breaker():
+    guard = ProviderGuard("test", timeout=0.1)
+    guard.breaker.reset_timeout = 0.05
+    open_breaker(guard)
+    time.sleep(0.1)
+
+    with pytest.raises(DeadlineExceeded):
+        guard.call(time.sleep, 0.5, deadline=Deadline(1))
+    assert guard.breaker.state == CircuitBreaker.OPEN
+
+
+def test_turn_deadline_timeouts_do_not_open_breaker():
+    guard = ProviderGuard("tts", timeout=5)
+    for _ in range(guard.breaker.failure_threshold):
+        with pytest.raises(DeadlineExceeded):
+            guard.call(time.sleep, 0.2, deadline=Deadline(0.05))
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+    assert guard.breaker.failures == 0
+
+
+def test_turn_deadline_cutting_probe_reopens_without_failure():
+    guard = ProviderGuard("test", timeout=1)
+    guard.breaker.reset_timeout = 0.05
+    open_breaker(guard)
+    failures = guard.breaker.failures
+    time.sleep(0.1)
+
+    with pytest.raises(DeadlineExceeded):
+        guard.call(time.sleep, 0.2, deadline=Deadline(0.05))
+    assert guard.breaker.state == CircuitBreaker.OPEN
+    assert guard.breaker.failures == failures
+
+
+def test_hedge_returns_first_response(monkeypatch):
+    monkeypatch.setattr("utils.resilience.HEDGE_DEFAULT_DELAY", 0.05)
+    guard = ProviderGuard("test", timeout=2, hedge=True)
+    calls = []
+
+    def slow_then_fast():
+        calls.append(1)
+        time.sleep(1 if len(calls) == 1 else 0.01)
+        return len(calls)
+
+    started = time.monotonic()
+    assert guard.call(slow_then_fast, deadline=Deadline(2)) == 2
+    assert time.monotonic() - started < 0.5
+
+
+def test_hedges_do_not_take_first_attempt_slots(monkeypatch):
+    monkeypatch.setattr("utils.resilience.HEDGE_DEFAULT_DELAY", 0.05)
+    guard = ProviderGuard("stt", timeout=2, hedge=True, workers=4)
+    results = []
+
+    def turn():
+        try:
+            results.append(guard.call(lambda: time.sleep(0.5) or "ok", deadline=Deadline(2)))
+        except CircuitOpenError as e:
+            results.append(type(e).__name__)
+
+    threads = []
+    for _ in range(4):
+        threads.append(threading.Thread(target=turn))
+        threads[-1].start()
+        time.sleep(0.1)
+    for thread in threads:
+        thread.join()
+    assert results == ["ok"] * 4
+
+
+def test_hung_provider_only_exhausts_its_own_workers():
+    hung = ProviderGuard("hung", timeout=0.05, workers=2)
+    healthy = ProviderGuard("healthy", timeout=1, workers=2)
+    release = threading.Event()
+
+    for _ in range(2):
+        with pytest.raises(DeadlineExceeded):
+            hung.call(release.wait, deadline=Deadline(1))
+    with pytest.raises(ProviderBusy):
+        hung.call(lambda: "ok", deadline=Deadline(1))
+
+    assert healthy.call(lambda: "ok", deadline=Deadline(1)) == "ok"
+    release.set()
+
+
+def test_abandoned_run_refuses_to_commit_after_its_deadline():
+    guard = ProviderGuard("agents", timeout=0.2)
+    committed = []
+
+    def side_effecting_run():
+        time.sleep(0.3)
+        if commit_allowed(margin=0):
+            committed.append(1)
+
+    def turn():
+        deadline = Deadline(0.2)
+        bind_deadline(deadline)
+        with pytest.raises(DeadlineExceeded):
+            guard.call(side_effecting_run, deadline=deadline)
+
+    contextvars.copy_context().run(turn)
+    time.sleep(0.3)
+    assert committed == []
+
+
+def test_commit_allowed_outside_a_turn():
+    assert contextvars.copy_context().run(commit_allowed)
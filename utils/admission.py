@@ -0,0 +1,75 @@
+import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+MAX_CONCURRENT_TURNS = int(os.getenv("MAX_CONCURRENT_TURNS", "8"))
+MAX_QUEUED_TURNS = int(os.getenv("MAX_QUEUED_TURNS", "16"))
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("QUEUE_TIMEOUT_SECONDS", "2"))
+
+
+class AdmissionRejected(Exception):
+    pass
+
+
+class AdmissionController:
+    """
+    Caps concurrent STT/LLM/TTS pipelines with a short bounded wait queue.
+    Turns that can't get a slot are rejected up front so admitted calls keep their latency.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_TURNS, max_queue=MAX_QUEUED_TURNS, queue_timeout=QUEUE_TIMEOUT_SECONDS):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def _reject(self, reason):
+        self.rejected += 1
+        logger.warning("Turn rejected (%s): active=%s waiting=%s rejected=%s", reason, self.active, self.waiting, self.rejected)
+        raise AdmissionRejected(reason)
+
+    @asynccontextmanager
+    async def admit(self, deadline=None):
+        # Count waiters rather than checking the semaphore, which is only taken once the acquire task runs
+        if self.active + self.waiting >= self.max_concurrent + self.max_queue:
+            self._reject("queue full")
+
+        timeout = self.queue_timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline.remaining())
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._reject("queue timeout")
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def status(self):
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+admission = AdmissionController()
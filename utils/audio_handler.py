@@ -1,11 +1,45 @@
 import requests
 import tempfile
 import os
+import struct
 import logging
 
 logger = logging.getLogger(__name__)
 
 class AudioHandler:
+    @staticmethod
+    def split_wav(buffer):
+        """
+        Parse a RIFF/WAVE buffer without copying it.
+        Returns (sample_rate, bits_per_sample, channels, pcm) where pcm is a memoryview of the data chunk.
+        Raises ValueError if the buffer is not PCM WAV.
+        """
+        view = memoryview(buffer).cast("B")
+        if len(view) < 12 or view[0:4] != b"RIFF" or view[8:12] != b"WAVE":
+            raise ValueError("Audio is not a RIFF/WAVE buffer")
+
+        fmt = None
+        offset = 12
+        while offset + 8 <= len(view):
+            chunk_id = view[offset:offset + 4].tobytes()
+            (chunk_size,) = struct.unpack_from("<I", view, offset + 4)
+            body = offset + 8
+            if chunk_id == b"fmt ":
+                if chunk_size < 16 or body + 16 > len(view):
+                    raise ValueError("WAV fmt chunk is truncated")
+                audio_format, channels, sample_rate = struct.unpack_from("<HHI", view, body)
+                (bits_per_sample,) = struct.unpack_from("<H", view, body + 14)
+                if audio_format != 1:
+                    raise ValueError(f"Unsupported WAV encoding: {audio_format}")
+                fmt = (sample_rate, bits_per_sample, channels)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError("WAV data chunk precedes fmt chunk")
+                # Streamed recordings often carry a placeholder size; clamp to what we actually have
+                return (*fmt, view[body:min(body + chunk_size, len(view))])
+            offset = body + chunk_size + (chunk_size & 1)
+        raise ValueError("WAV buffer has no data chunk")
+
     @staticmethod
     def download_audio_from_url(audio_url, output_path=None):
         """
@@ -21,10 +55,10 @@ class AudioHandler:
             r.raise_for_status()
             with open(output_path, "wb") as f:
                 f.write(r.content)
-            logger.info(f"Downloaded audio to {output_path}")
+            logger.info("Downloaded audio to %s", output_path)
             return output_path
         except Exception as e:
-            logger.error(f"Error downloading audio from {audio_url}: {e}")
+            logger.error("Error downloading audio from %s: %s", audio_url, e)
             return None
 
     @staticmethod
@@ -33,6 +67,6 @@ class AudioHandler:
         try:
             if filepath and os.path.exists(filepath):
                 os.unlink(filepath)
-                logger.info(f"Deleted temporary file {filepath}")
+                logger.info("Deleted temporary file %s", filepath)
         except Exception as e:
-            logger.warning(f"Could not delete temp file {filepath}: {e}")
+            logger.warning("Could not delete temp file %s: %s", filepath, e)
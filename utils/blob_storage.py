@@ -25,14 +25,21 @@ class AzureBlobStorage:
         if not blob_name:
             blob_name = os.path.basename(file_path)
         try:
-            blob_client = self.client.get_blob_client(self.container, blob_name)
             with open(file_path, "rb") as data:
-                blob_client.upload_blob(data, overwrite=True)
-            url = f"https://{self.account_name}.blob.core.windows.net/{self.container}/{blob_name}"
-            logger.info(f"Uploaded audio file successfully: {url}")
-            return url
+                return self.upload_audio(data, blob_name)
         except Exception as ex:
-            logger.error(f"Failed to upload blob '{blob_name}': {ex}")
+            logger.error("Failed to upload blob '%s': %s", blob_name, ex)
             return None
 
+    def upload_audio(self, data, blob_name, timeout=None):
+        """Upload audio bytes or a file object and return its URL; raises on failure."""
+        blob_client = self.client.get_blob_client(self.container, blob_name)
+        if timeout:
+            blob_client.upload_blob(data, overwrite=True, timeout=max(1, int(timeout)))
+        else:
+            blob_client.upload_blob(data, overwrite=True)
+        url = f"https://{self.account_name}.blob.core.windows.net/{self.container}/{blob_name}"
+        logger.info("Uploaded audio file successfully: %s", url)
+        return url
+
 blob_storage = AzureBlobStorage()
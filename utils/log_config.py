@@ -0,0 +1,86 @@
+import os
+import sys
+import queue
+import atexit
+import random
+import logging
+import contextvars
+from logging.handlers import QueueHandler, QueueListener
+from pythonjsonlogger import jsonlogger
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.1"))
+
+call_sid_var = contextvars.ContextVar("call_sid", default=None)
+stage_var = contextvars.ContextVar("stage", default=None)
+
+_listener = None
+
+
+class CallContextFilter(logging.Filter):
+    """Stamps CallSid and pipeline stage onto records in the emitting thread, before they are queued."""
+
+    def filter(self, record):
+        record.call_sid = call_sid_var.get()
+        record.stage = stage_var.get()
+        return True
+
+
+def bind_call(call_sid):
+    call_sid_var.set(call_sid)
+    stage_var.set(None)
+
+
+def set_stage(stage):
+    stage_var.set(stage)
+
+
+def debug_payload(logger, msg, *args):
+    """
+    Log a bulky payload (Exotel params, transcripts, LLM replies) at DEBUG for a sample of turns.
+    The level and sampling checks run before any argument is formatted.
+    """
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < LOG_PAYLOAD_SAMPLE_RATE:
+        logger.debug(msg, *args)
+
+
+def configure_logging(level=LOG_LEVEL, stream=None):
+    """
+    Route the app's and uvicorn's records through a queue to a background JSON writer (stdout by default).
+    Request handlers only enqueue; the stream write happens on the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(jsonlogger.JsonFormatter(
+        "%(asctime)s %(levelname)s %(name)s %(message)s %(call_sid)s %(stage)s",
+        rename_fields={"asctime": "timestamp", "levelname": "level", "name": "logger"},
+    ))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(CallContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+    # uvicorn's own loggers don't propagate to root and write to the stream directly; send them through the queue too
+    for name in ("uvicorn", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = [queue_handler]
+        uvicorn_logger.propagate = False
+
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Drain the queue; safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
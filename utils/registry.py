@@ -0,0 +1,87 @@
+import time
+import logging
+import importlib
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class LazyProvider:
+    """Imports and builds a provider on first use, once, even under concurrent callers."""
+
+    def __init__(self, name, module, attr, factory=False):
+        self.name = name
+        self.module = module
+        self.attr = attr
+        self.factory = factory
+        self.error = None
+        self.load_seconds = None
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def warm(self):
+        return self._instance is not None
+
+    def get(self):
+        if self._instance is not None:
+            return self._instance
+        with self._lock:
+            if self._instance is None:
+                started = time.perf_counter()
+                try:
+                    target = getattr(importlib.import_module(self.module), self.attr)
+                    self._instance = target() if self.factory else target
+                    self.error = None
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                finally:
+                    self.load_seconds = time.perf_counter() - started
+                logger.info("Provider %s ready in %.2fs", self.name, self.load_seconds)
+        return self._instance
+
+    def status(self):
+        return {
+            "warm": self.warm,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "error": self.error,
+        }
+
+
+class ProviderRegistry:
+    def __init__(self):
+        self._providers = {}
+
+    def register(self, name, module, attr, factory=False):
+        self._providers[name] = LazyProvider(name, module, attr, factory)
+
+    def get(self, name):
+        return self._providers[name].get()
+
+    def warm_up(self, names=None):
+        """Background warm-up hook; failures are recorded in status() rather than raised."""
+        for name in names or list(self._providers):
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.error("Provider %s failed to warm up: %s", name, e)
+
+    def ready(self, names=None):
+        return all(self._providers[name].warm for name in names or self._providers)
+
+    def status(self):
+        return {name: provider.status() for name, provider in self._providers.items()}
+
+
+# Nothing below is imported until first use or warm-up
+registry = ProviderRegistry()
+registry.register("db", "database.queries", "HotelDatabase", factory=True)
+registry.register("stt", "agents.stt_tool", "stt_tool")
+registry.register("llm", "agents.llm_tools", "llm_tool")
+registry.register("tts", "agents.tts_tool", "tts_tool")
+registry.register("agents", "agents.autogen_agents", "manager")
+registry.register("blob_storage", "utils.blob_storage", "blob_storage")
+
+# Blob storage is best-effort, so readiness doesn't wait on it
+CORE_PROVIDERS = ["db", "stt", "llm", "tts", "agents"]
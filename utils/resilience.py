@@ -0,0 +1,240 @@
+import os
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+TURN_DEADLINE_SECONDS = float(os.getenv("TURN_DEADLINE_SECONDS", "10"))
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "2.0"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+PROVIDER_WORKERS = int(os.getenv("PROVIDER_WORKERS", "8"))
+COMMIT_MARGIN_SECONDS = float(os.getenv("COMMIT_MARGIN_SECONDS", "1.5"))
+
+# Deadline of the stage currently running; copied into provider workers with the rest of the context
+_stage_deadline = contextvars.ContextVar("stage_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class ProviderBusy(CircuitOpenError):
+    """Every worker for this provider is still tied up (usually in abandoned, hung calls)."""
+
+
+class Deadline:
+    """Absolute per-turn deadline carried through every pipeline stage."""
+
+    def __init__(self, seconds=TURN_DEADLINE_SECONDS):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, cap=None):
+        """Return the time budget for the next stage, raising if nothing is left."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("Turn deadline exceeded")
+        return min(remaining, cap) if cap else remaining
+
+
+def bind_deadline(deadline):
+    _stage_deadline.set(deadline)
+
+
+def commit_allowed(margin=COMMIT_MARGIN_SECONDS):
+    """
+    Whether a side-effecting tool may still write. Guards abandon calls at their deadline without
+    stopping them, so writes must be refused once the caller can no longer hear the result.
+    Always True outside a bound stage (scripts, tests).
+    """
+    deadline = _stage_deadline.get()
+    return deadline is None or deadline.remaining() > margin
+
+
+class LatencyTracker:
+    """Rolling window of call latencies used to pick the hedge delay."""
+
+    def __init__(self, window=200, min_samples=20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct):
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+        return ordered[index]
+
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures; half-open probe after the reset timeout."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let a single probe through; everyone else keeps failing fast
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def release_probe(self):
+        """An inconclusive half-open probe: go back to open without counting a failure."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Circuit breaker opened for %s", self.name)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class ProviderGuard:
+    """
+    Wraps calls to one external provider with deadline, hedging and a circuit breaker.
+    Each provider gets its own bounded pool, so a hung provider can only exhaust its own workers.
+    Hedges draw from a separate, smaller set of slots so they never crowd out first attempts.
+    """
+
+    def __init__(self, name, timeout=30.0, hedge=False, workers=PROVIDER_WORKERS):
+        self.name = name
+        self.timeout = timeout
+        self.hedge = hedge
+        self.breaker = CircuitBreaker(name)
+        self.latency = LatencyTracker()
+        hedge_workers = max(1, workers // 4) if hedge else 0
+        # Abandoned (timed out or hedged-out) calls finish here in the background
+        self._executor = ThreadPoolExecutor(max_workers=workers + hedge_workers, thread_name_prefix=f"provider-{name}")
+        self._slots = threading.BoundedSemaphore(workers)
+        self._hedge_slots = threading.BoundedSemaphore(hedge_workers) if hedge else None
+
+    def hedge_delay(self):
+        delay = self.latency.percentile(HEDGE_PERCENTILE)
+        return delay if delay is not None else HEDGE_DEFAULT_DELAY
+
+    def _submit(self, slots, fn, *args, **kwargs):
+        """Run on a worker whose slot the caller already holds; the slot is released when the call ends."""
+        try:
+            # Fresh context copy per task so provider logs keep the caller's CallSid and stage
+            future = self._executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def call(self, fn, *args, deadline, **kwargs):
+        """
+        Run fn(*args, **kwargs) within the remaining turn budget, hedging once if enabled.
+        Raises CircuitOpenError (or ProviderBusy), DeadlineExceeded or the provider's own exception.
+        Only provider errors and the provider's own timeout count against the breaker; running out of
+        turn budget left by earlier stages does not.
+        """
+        # Everything that can fail without reaching the provider happens before the breaker admits us,
+        # so a half-open probe always ends in success, failure or release_probe
+        budget = deadline.timeout(self.timeout)
+        own_timeout = budget >= self.timeout
+        if not self._slots.acquire(blocking=False):
+            raise ProviderBusy(f"{self.name} has no free workers")
+        if not self.breaker.allow_request():
+            self._slots.release()
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+        succeeded = False
+        inconclusive = False
+        try:
+            started = time.monotonic()
+            pending = {self._submit(self._slots, fn, *args, **kwargs)}
+            last_error = None
+
+            if self.hedge:
+                done, pending = wait(pending, timeout=min(self.hedge_delay(), budget), return_when=FIRST_COMPLETED)
+                if done:
+                    pending |= done
+                elif deadline.remaining() > 0 and self._hedge_slots.acquire(blocking=False):
+                    logger.info("Hedging slow %s request", self.name)
+                    pending.add(self._submit(self._hedge_slots, fn, *args, **kwargs))
+
+            while pending:
+                left = min(deadline.remaining(), budget - (time.monotonic() - started))
+                if left <= 0:
+                    break
+                done, pending = wait(pending, timeout=left, return_when=FIRST_COMPLETED)
+                for future in done:
+                    error = future.exception()
+                    if error is None:
+                        self.latency.record(time.monotonic() - started)
+                        self.breaker.record_success()
+                        succeeded = True
+                        return future.result()
+                    last_error = error
+
+            if last_error is not None and not pending:
+                raise last_error
+            # Cut off by what earlier stages left of the turn, not by this provider's own timeout
+            inconclusive = not own_timeout and last_error is None
+            raise DeadlineExceeded(f"{self.name} did not respond within the turn deadline")
+        finally:
+            if inconclusive:
+                self.breaker.release_probe()
+            elif not succeeded:
+                self.breaker.record_failure()
+
+    def status(self):
+        return {"state": self.breaker.state, "failures": self.breaker.failures, "hedge_delay": round(self.hedge_delay(), 3)}
+
+
+# One guard per external provider
+providers = {
+    "recording": ProviderGuard("recording", timeout=float(os.getenv("RECORDING_TIMEOUT", "5"))),
+    "azure_stt": ProviderGuard("azure_stt", timeout=float(os.getenv("STT_TIMEOUT", "6")), hedge=True),
+    "deepseek": ProviderGuard("deepseek", timeout=float(os.getenv("LLM_TIMEOUT", "6")), hedge=True),
+    "agents": ProviderGuard("agents", timeout=float(os.getenv("AGENTS_TIMEOUT", "8"))),
+    "azure_tts": ProviderGuard("azure_tts", timeout=float(os.getenv("TTS_TIMEOUT", "5"))),
+    "blob_storage": ProviderGuard("blob_storage", timeout=float(os.getenv("BLOB_TIMEOUT", "3"))),
+}